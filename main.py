@@ -14,10 +14,8 @@ from tqdm import tqdm
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from audio.youtube_downloader import YouTubeAudioDownloader
-from audio.preprocessor import AudioPreprocessor
-from transcription.analyzer import MusicTranscriber
-from sheet_music.generator import SheetMusicGenerator
+# Pipeline components are imported lazily in YouTubeMusicTranscriber so
+# that e.g. `--help` does not pay for librosa/music21 startup
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +28,11 @@ class YouTubeMusicTranscriber:
     """Main application class."""
     
     def __init__(self, output_dir="output", temp_dir="temp"):
+        from audio.youtube_downloader import YouTubeAudioDownloader
+        from audio.preprocessor import AudioPreprocessor
+        from transcription.analyzer import MusicTranscriber
+        from sheet_music.generator import SheetMusicGenerator
+
         self.output_dir = Path(output_dir)
         self.temp_dir = Path(temp_dir)
         
@@ -61,25 +64,31 @@ class YouTubeMusicTranscriber:
             
             # Get video info for filename
             if not output_name:
+                from audio.youtube_downloader import sanitize_title
                 try:
                     video_info = self.downloader.get_video_info(url)
                     title = video_info.get('title', 'unknown')
-                    output_name = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-                    output_name = output_name.replace(' ', '_')[:50]  # Limit length
+                    output_name = sanitize_title(title).replace(' ', '_')[:50]  # Limit length
                 except:
                     output_name = "transcription"
             
             # Step 2: Preprocess audio
             logger.info("Preprocessing audio...")
             audio, sr, _ = self.preprocessor.preprocess_audio(audio_file)
-            audio_stats = self.preprocessor.get_audio_stats(audio, sr)
-            logger.info(f"Audio stats: {audio_stats}")
+            # Full stats need several passes over the samples; only compute
+            # them if they will actually be logged
+            if logger.isEnabledFor(logging.INFO):
+                audio_stats = self.preprocessor.get_audio_stats(audio, sr)
+                logger.info(f"Audio stats: {audio_stats}")
+            else:
+                audio_stats = self.preprocessor.get_audio_stats_cheap(audio, sr)
             
             # Step 3: Transcribe music
             logger.info("Transcribing music...")
             notes, tempo = self.transcriber.transcribe_audio(audio, sr)
             transcription_stats = self.transcriber.get_transcription_stats(notes)
-            logger.info(f"Transcription stats: {transcription_stats}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Transcription stats: {transcription_stats}")
             
             # Step 4: Generate sheet music
             logger.info("Generating sheet music...")
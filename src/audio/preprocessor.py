@@ -3,18 +3,79 @@ Audio preprocessing module.
 Handles audio normalization, noise reduction, and format conversion.
 """
 
-import librosa
+import functools
+import hashlib
 import numpy as np
 import soundfile as sf
+import soxr
 from pathlib import Path
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, oaconvolve, sosfiltfilt
 import logging
 
+@functools.lru_cache(maxsize=16)
+def _design_highpass_sos(order: int, cutoff: float, sr: int) -> np.ndarray:
+    """Butterworth highpass in SOS form, cached per (order, cutoff, sr)."""
+    return butter(order, cutoff / (sr * 0.5), btype='high', output='sos')
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    # Numba is optional; the callers below fall back to NumPy/SciPy
+    _HAVE_NUMBA = False
+
+if _HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _frame_energy(audio, frame_length, hop_length):
+        """Per-frame sum of squares, computed in parallel from the raw signal."""
+        n_frames = (audio.size - frame_length) // hop_length + 1
+        out = np.empty(n_frames, dtype=np.float64)
+        for i in prange(n_frames):
+            base = i * hop_length
+            total = 0.0
+            for j in range(frame_length):
+                x = audio[base + j]
+                total += x * x
+            out[i] = total
+        return out
+
+    @njit(cache=True)
+    def _audio_stats_kernel(audio):
+        """Max-abs, sum of squares and zero crossings in one pass."""
+        max_abs = 0.0
+        sum_sq = 0.0
+        zero_crossings = 0
+        prev_positive = audio[0] >= 0
+        for i in range(audio.size):
+            x = audio[i]
+            ax = abs(x)
+            if ax > max_abs:
+                max_abs = ax
+            sum_sq += x * x
+            positive = x >= 0
+            if positive != prev_positive:
+                zero_crossings += 1
+            prev_positive = positive
+        return max_abs, sum_sq, zero_crossings
+
 class AudioPreprocessor:
     """Preprocess audio for better transcription results."""
-    
-    def __init__(self, target_sr=22050):
+
+    def __init__(self, target_sr=22050, cache_features=True, cache_dir="cache"):
         self.target_sr = target_sr
+        self.cache_features = cache_features
+        self.cache_dir = Path(cache_dir)
+
+    def _feature_cache_path(self, file_path: str) -> Path:
+        """Cache file path for the preprocessed version of an audio file."""
+        # Hash the whole file: hashing is far cheaper than the filter
+        # chain, and a head-only key collides on files sharing an intro
+        # (e.g. leading silence)
+        sig = hashlib.sha1(str(self.target_sr).encode())
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                sig.update(chunk)
+        return self.cache_dir / f"{sig.hexdigest()}.npy"
     
     def load_audio(self, file_path: str) -> tuple:
         """
@@ -27,6 +88,40 @@ class AudioPreprocessor:
             Tuple of (audio_data, sample_rate)
         """
         try:
+            # Decode with soundfile in fixed-size blocks and resample each
+            # block through a streaming soxr resampler, so only the final
+            # float32 signal is ever held in memory (no full-length decode
+            # buffer); medium quality is plenty for transcription
+            chunks = []
+            with sf.SoundFile(file_path) as f:
+                resampler = None
+                if f.samplerate != self.target_sr:
+                    resampler = soxr.ResampleStream(
+                        f.samplerate, self.target_sr, 1,
+                        dtype='float32', quality='MQ')
+                for block in f.blocks(blocksize=65536, dtype='float32',
+                                      always_2d=False):
+                    if block.ndim == 2:
+                        block = block.mean(axis=1, dtype=np.float32)
+                    if resampler is not None:
+                        block = resampler.resample_chunk(block, last=False)
+                    if len(block):
+                        chunks.append(block)
+                if resampler is not None:
+                    tail = resampler.resample_chunk(
+                        np.empty(0, dtype=np.float32), last=True)
+                    if len(tail):
+                        chunks.append(tail)
+            if chunks:
+                audio = np.concatenate(chunks)
+            else:
+                audio = np.empty(0, dtype=np.float32)
+            return audio, self.target_sr
+        except Exception as e:
+            logging.warning(f"soundfile decode failed for {file_path}, "
+                            f"falling back to librosa: {str(e)}")
+        try:
+            import librosa
             audio, sr = librosa.load(file_path, sr=self.target_sr)
             return audio, sr
         except Exception as e:
@@ -62,14 +157,48 @@ class AudioPreprocessor:
             Filtered audio signal
         """
         try:
-            nyquist = sr * 0.5
-            normal_cutoff = cutoff / nyquist
-            b, a = butter(6, normal_cutoff, btype='high', analog=False)
-            return filtfilt(b, a, audio)
+            # Second-order sections are numerically stable at order 6 and
+            # faster than the transfer-function form; the design is cached
+            # across calls with the same parameters
+            sos = _design_highpass_sos(6, cutoff, sr)
+            # sosfiltfilt upcasts to float64 (the SOS matrix's dtype);
+            # cast back so the pipeline's main buffer stays float32
+            return sosfiltfilt(sos, audio).astype(np.float32)
         except Exception as e:
             logging.warning(f"Failed to apply highpass filter: {str(e)}")
             return audio
     
+    def normalize_and_filter(self, audio: np.ndarray, sr: int, cutoff: float = 80.0) -> np.ndarray:
+        """
+        Normalize amplitude and apply the highpass filter in one pass.
+
+        Folding the 1/max gain into the first filter section avoids a
+        separate normalization pass over the audio buffer.
+
+        Args:
+            audio: Audio signal
+            sr: Sample rate
+            cutoff: Cutoff frequency in Hz
+
+        Returns:
+            Normalized, filtered audio signal
+        """
+        try:
+            sos = _design_highpass_sos(6, cutoff, sr)
+            max_val = np.abs(audio).max() if len(audio) else 0
+            if max_val > 0:
+                # sosfiltfilt applies the sections twice (forward + backward),
+                # so scale the first numerator by 1/sqrt(max) for a net 1/max.
+                # Copy first: the cached design must not be mutated.
+                sos = sos.copy()
+                sos[0, :3] /= np.sqrt(max_val)
+            # Filter internally in float64, but hand the pipeline (and the
+            # preprocessed-audio cache) a float32 buffer again
+            return sosfiltfilt(sos, audio).astype(np.float32)
+        except Exception as e:
+            logging.warning(f"Failed to normalize/filter audio: {str(e)}")
+            return self.normalize_audio(audio)
+
     def trim_silence(self, audio: np.ndarray, sr: int) -> np.ndarray:
         """
         Trim silence from beginning and end of audio.
@@ -82,13 +211,63 @@ class AudioPreprocessor:
             Trimmed audio signal
         """
         try:
-            # Use librosa's trim function
+            # Use librosa's trim function (imported lazily; librosa is slow
+            # to import and not needed for cached runs)
+            import librosa
             audio_trimmed, _ = librosa.effects.trim(audio, top_db=20)
             return audio_trimmed
         except Exception as e:
             logging.warning(f"Failed to trim silence: {str(e)}")
             return audio
     
+    def trim_silence_fast(self, audio: np.ndarray, sr: int, top_db: float = 20.0) -> np.ndarray:
+        """
+        Trim silence from beginning and end using windowed energy.
+
+        Equivalent thresholding to librosa.effects.trim but based on frame
+        energy instead of a full STFT, which is much cheaper on long audio.
+
+        Args:
+            audio: Audio signal
+            sr: Sample rate
+            top_db: Threshold below the peak frame (in dB) treated as silence
+
+        Returns:
+            Trimmed audio signal
+        """
+        try:
+            frame_length = 2048
+            hop_length = 512
+            if len(audio) < frame_length:
+                return audio
+
+            if _HAVE_NUMBA:
+                energy = _frame_energy(audio, frame_length, hop_length)
+            else:
+                box = np.ones(frame_length, dtype=audio.dtype)
+                energy = oaconvolve(audio * audio, box, mode='valid')[::hop_length]
+
+            ref = energy.max()
+            if ref <= 0:
+                return audio
+
+            # Energy is amplitude squared, so 10*log10 matches librosa's
+            # 20*log10 on RMS amplitude. Zero-energy frames (digital
+            # silence) give -inf, which compares as silent without the
+            # divide-by-zero warning
+            with np.errstate(divide='ignore'):
+                non_silent = np.flatnonzero(
+                    10.0 * np.log10(energy / ref) > -top_db)
+            if non_silent.size == 0:
+                return audio
+
+            start = non_silent[0] * hop_length
+            end = min(len(audio), non_silent[-1] * hop_length + frame_length)
+            return audio[start:end]
+        except Exception as e:
+            logging.warning(f"Failed to trim silence: {str(e)}")
+            return audio
+
     def reduce_noise(self, audio: np.ndarray, sr: int) -> np.ndarray:
         """
         Simple noise reduction using spectral gating.
@@ -101,26 +280,36 @@ class AudioPreprocessor:
             Noise-reduced audio signal
         """
         try:
-            # Compute spectral centroid to identify noise
-            S = np.abs(librosa.stft(audio))
-            centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
-            
-            # Simple noise gate based on energy
+            # Simple noise gate based on energy: per-frame energy is a box
+            # filter over the squared signal, which the overlap-add
+            # convolution computes in O(N log N) without a strided frame view
             frame_length = 2048
             hop_length = 512
-            frames = librosa.util.frame(audio, frame_length=frame_length, hop_length=hop_length)
-            energy = np.sum(frames**2, axis=0)
+            if _HAVE_NUMBA and len(audio) >= frame_length:
+                # Multicore SIMD loop over frames, no intermediate arrays
+                energy = _frame_energy(audio, frame_length, hop_length)
+            else:
+                box = np.ones(frame_length, dtype=audio.dtype)
+                energy = oaconvolve(audio * audio, box, mode='valid')[::hop_length]
             energy_threshold = np.percentile(energy, 30)  # Keep frames above 30th percentile
             
-            # Reconstruct audio keeping only high-energy frames
-            result = np.zeros_like(audio)
-            for i, frame_energy in enumerate(energy):
-                start_idx = i * hop_length
-                end_idx = min(start_idx + frame_length, len(audio))
-                if frame_energy > energy_threshold:
-                    result[start_idx:end_idx] = audio[start_idx:end_idx]
-            
-            return result
+            # Build a sample-domain mask in one vectorized pass instead of
+            # copying frames one by one in Python. Each frame's window
+            # spans frame_length // hop_length hop blocks, so a sample is
+            # kept if any of the overlapping frames covering it passed the
+            # gate; dilate the frame mask over that span before repeating
+            frame_mask = energy > energy_threshold
+            keep = frame_mask.copy()
+            for shift in range(1, frame_length // hop_length):
+                keep[shift:] |= frame_mask[:-shift]
+            sample_mask = np.repeat(
+                keep.astype(audio.dtype), hop_length)[:len(audio)]
+            if len(sample_mask) < len(audio):
+                # Pad the tail (last partial frame) so the mask covers all samples
+                sample_mask = np.pad(sample_mask, (0, len(audio) - len(sample_mask)),
+                                     mode='edge')
+
+            return audio * sample_mask
         except Exception as e:
             logging.warning(f"Failed to reduce noise: {str(e)}")
             return audio
@@ -137,17 +326,29 @@ class AudioPreprocessor:
             Tuple of (processed_audio, sample_rate, output_file_path)
         """
         try:
+            # Reuse cached preprocessed audio for identical input/parameters
+            cache_path = None
+            if self.cache_features:
+                cache_path = self._feature_cache_path(file_path)
+                if cache_path.exists():
+                    logging.info(f"Using cached preprocessed audio from {cache_path}")
+                    audio = np.load(cache_path, mmap_mode='r')
+                    return audio, self.target_sr, None
+
             # Load audio
             audio, sr = self.load_audio(file_path)
             logging.info(f"Loaded audio: {len(audio)} samples at {sr} Hz")
-            
+
             # Preprocessing steps
-            audio = self.trim_silence(audio, sr)
-            audio = self.normalize_audio(audio)
-            audio = self.apply_highpass_filter(audio, sr)
+            audio = self.trim_silence_fast(audio, sr)
+            audio = self.normalize_and_filter(audio, sr)
             # Note: Noise reduction can be aggressive, so it's optional
             # audio = self.reduce_noise(audio, sr)
-            
+
+            if cache_path is not None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                np.save(cache_path, audio)
+
             # Save processed audio if output path is provided
             if output_path:
                 output_path = Path(output_path)
@@ -162,6 +363,23 @@ class AudioPreprocessor:
             logging.error(f"Failed to preprocess audio {file_path}: {str(e)}")
             raise
     
+    def get_audio_stats_cheap(self, audio: np.ndarray, sr: int) -> dict:
+        """
+        Get audio statistics that do not require reading the samples.
+
+        Args:
+            audio: Audio signal
+            sr: Sample rate
+
+        Returns:
+            Dictionary with duration, sample rate and channel count
+        """
+        return {
+            'duration': len(audio) / sr,
+            'sample_rate': sr,
+            'channels': 1,  # We load as mono
+        }
+
     def get_audio_stats(self, audio: np.ndarray, sr: int) -> dict:
         """
         Get basic audio statistics.
@@ -173,11 +391,23 @@ class AudioPreprocessor:
         Returns:
             Dictionary with audio statistics
         """
+        if _HAVE_NUMBA and len(audio) > 1:
+            # One fused pass instead of three full reads of the signal
+            max_abs, sum_sq, zero_crossings = _audio_stats_kernel(audio)
+            max_amplitude = max_abs
+            rms_energy = np.sqrt(sum_sq / len(audio))
+            zero_crossing_rate = zero_crossings / (len(audio) - 1)
+        else:
+            import librosa
+            max_amplitude = np.max(np.abs(audio))
+            rms_energy = np.sqrt(np.mean(audio**2))
+            zero_crossing_rate = np.mean(librosa.feature.zero_crossing_rate(audio)[0])
+
         return {
             'duration': len(audio) / sr,
             'sample_rate': sr,
             'channels': 1,  # We load as mono
-            'max_amplitude': np.max(np.abs(audio)),
-            'rms_energy': np.sqrt(np.mean(audio**2)),
-            'zero_crossing_rate': np.mean(librosa.feature.zero_crossing_rate(audio)[0]),
+            'max_amplitude': max_amplitude,
+            'rms_energy': rms_energy,
+            'zero_crossing_rate': zero_crossing_rate,
         }
@@ -4,17 +4,48 @@ Downloads audio from YouTube URLs using yt-dlp.
 """
 
 import os
+import hashlib
+import re
+import shutil
 import yt_dlp
 from pathlib import Path
 import logging
 
+# Deletes every ASCII character that is not alphanumeric, space, '-' or '_'
+# in a single C-level pass (see sanitize_title)
+_SANITIZE_TABLE = str.maketrans({
+    c: None for c in map(chr, range(128))
+    if not (c.isalnum() or c in (' ', '-', '_'))
+})
+# Non-ASCII punctuation (em-dashes, CJK brackets, emoji...) is beyond the
+# table's range; a Unicode \w pass removes whatever it missed while
+# keeping accented letters, matching the original per-character filter
+_NON_WORD_RE = re.compile(r'[^\w \-]')
+
+def sanitize_title(title: str) -> str:
+    """
+    Make a video title safe to use as a filename.
+
+    Args:
+        title: Raw video title
+
+    Returns:
+        Title with unsafe characters removed and whitespace stripped
+    """
+    return _NON_WORD_RE.sub('', title.translate(_SANITIZE_TABLE)).strip()
+
 class YouTubeAudioDownloader:
     """Download audio from YouTube URLs."""
     
-    def __init__(self, output_dir="temp"):
+    def __init__(self, output_dir="temp", cache_dir="cache"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        
+        # Downloaded wavs are linked here keyed by URL hash; unlike the
+        # temp dir this is not wiped by cleanup(), so repeated runs on
+        # the same URL actually skip the network round-trip
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+
         # Configure yt-dlp options for audio extraction
         self.ydl_opts = {
             'format': 'bestaudio/best',
@@ -28,6 +59,9 @@ class YouTubeAudioDownloader:
             'quiet': True,
             'no_warnings': True,
         }
+        # Metadata from the most recent download, so get_video_info does
+        # not have to re-fetch it
+        self._last_info = None
     
     def download_audio(self, url: str) -> str:
         """
@@ -42,28 +76,38 @@ class YouTubeAudioDownloader:
         Raises:
             Exception: If download fails
         """
+        # Reuse a previously downloaded file for the same URL if present
+        cache_key = hashlib.sha1(url.encode()).hexdigest()
+        cached_file = self.cache_dir / f"{cache_key}.wav"
+        if cached_file.exists():
+            logging.info(f"Using cached audio for {url}")
+            return str(cached_file)
+
         try:
             with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                # Extract video info
-                info = ydl.extract_info(url, download=False)
-                title = info.get('title', 'unknown')
-                
-                # Sanitize filename
-                safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                output_file = self.output_dir / f"{safe_title}.wav"
-                
-                # Update output template
-                self.ydl_opts['outtmpl'] = str(self.output_dir / f"{safe_title}.%(ext)s")
-                
-                # Download
-                with yt_dlp.YoutubeDL(self.ydl_opts) as ydl_download:
-                    ydl_download.download([url])
-                
+                # One extract_info call fetches metadata and downloads in a
+                # single pass instead of two metadata round-trips
+                info = ydl.extract_info(url, download=True)
+                self._last_info = info
+
+                # yt-dlp reports the post-processed file path directly
+                downloads = info.get('requested_downloads') or [{}]
+                filepath = downloads[0].get('filepath')
+                if filepath:
+                    output_file = Path(filepath)
+                else:
+                    output_file = Path(ydl.prepare_filename(info)).with_suffix('.wav')
+
                 if output_file.exists():
+                    # Link under the URL hash so repeated runs skip the download
+                    try:
+                        os.link(output_file, cached_file)
+                    except OSError:
+                        pass
                     return str(output_file)
                 else:
                     raise Exception(f"Audio file not found after download: {output_file}")
-                    
+
         except Exception as e:
             logging.error(f"Failed to download audio from {url}: {str(e)}")
             raise
@@ -78,6 +122,11 @@ class YouTubeAudioDownloader:
         Returns:
             Video information dictionary
         """
+        # Reuse the metadata already fetched by download_audio
+        if self._last_info and url in (self._last_info.get('webpage_url'),
+                                       self._last_info.get('original_url')):
+            return self._last_info
+
         try:
             with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
                 return ydl.extract_info(url, download=False)
@@ -87,6 +136,7 @@ class YouTubeAudioDownloader:
     
     def cleanup(self):
         """Remove temporary files."""
-        for file in self.output_dir.glob("*"):
-            if file.is_file():
-                file.unlink()
+        # rmtree batches the unlinks and also catches yt-dlp leftovers
+        # (.part/.ytdl fragments, subdirectories) the old per-file loop missed
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -3,13 +3,45 @@ Sheet music generation module.
 Converts transcribed notes into sheet music notation using music21.
 """
 
-import music21
-from music21 import stream, note, duration, tempo, meter, key, pitch
-import pretty_midi
-from typing import List, Optional
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, TYPE_CHECKING
 from pathlib import Path
 import logging
 
+# music21 takes seconds to import, so it is loaded lazily inside the
+# methods that need it rather than at module import time
+if TYPE_CHECKING:
+    from music21 import stream
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; fall back to the pure-Python implementation
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator if not (args and callable(args[0])) else args[0]
+
+# Standard durations from shortest to longest, with the beat thresholds
+# separating them (see quantize_duration)
+_DURATION_NAMES = ("32nd", "16th", "eighth", "quarter", "half", "whole")
+_DURATION_THRESHOLDS = np.array([0.21875, 0.4375, 0.875, 1.75, 3.5])
+
+@njit(cache=True)
+def _quantize_bucket(duration_beats: np.ndarray) -> np.ndarray:
+    """Map an array of durations in beats to indices into _DURATION_NAMES."""
+    return np.searchsorted(_DURATION_THRESHOLDS, duration_beats, side='right')
+
+@functools.lru_cache(maxsize=128)
+def _midi_name(midi_number: int) -> str:
+    """Note name for a MIDI number; there are only 128, so cache them all."""
+    from music21 import pitch
+    p = pitch.Pitch()
+    p.midi = midi_number
+    return p.nameWithOctave
+
 # Import our Note class from transcription module
 import sys
 sys.path.append('..')
@@ -34,9 +66,7 @@ class SheetMusicGenerator:
             Note name string (e.g., 'C4', 'F#3')
         """
         try:
-            p = pitch.Pitch()
-            p.midi = int(midi_number)
-            return p.nameWithOctave
+            return _midi_name(int(midi_number))
         except:
             return 'C4'  # fallback
     
@@ -54,22 +84,12 @@ class SheetMusicGenerator:
         # Convert seconds to beats (assuming 4/4 time)
         beats_per_second = tempo_bpm / 60
         duration_beats = duration_seconds * beats_per_second
-        
-        # Quantize to nearest standard duration
-        if duration_beats >= 3.5:
-            return "whole"
-        elif duration_beats >= 1.75:
-            return "half"
-        elif duration_beats >= 0.875:
-            return "quarter"
-        elif duration_beats >= 0.4375:
-            return "eighth"
-        elif duration_beats >= 0.21875:
-            return "16th"
-        else:
-            return "32nd"
+
+        # Branchless lookup against the precomputed thresholds
+        bucket = np.searchsorted(_DURATION_THRESHOLDS, duration_beats, side='right')
+        return _DURATION_NAMES[int(bucket)]
     
-    def create_music21_score(self, notes: List[Note], tempo_bpm: float = 120) -> stream.Stream:
+    def create_music21_score(self, notes: List[Note], tempo_bpm: float = 120) -> "stream.Stream":
         """
         Create a music21 Score from transcribed notes.
         
@@ -80,6 +100,9 @@ class SheetMusicGenerator:
         Returns:
             music21 Stream object
         """
+        import music21
+        from music21 import stream, note, duration, tempo, meter, key
+
         try:
             # Create a new score
             score = stream.Score()
@@ -111,25 +134,39 @@ class SheetMusicGenerator:
             else:
                 # Sort notes by start time
                 sorted_notes = sorted(notes, key=lambda n: n.start_time)
-                
-                current_time = 0
-                
-                for n in sorted_notes:
+
+                # Precompute all timing math as arrays: the gap before each
+                # note (from the previous note's end) and the note lengths,
+                # both quantized in one batched call. The loop below only
+                # builds music21 objects from precomputed strings.
+                beats_per_second = tempo_bpm / 60
+                starts = np.array([n.start_time for n in sorted_notes])
+                ends = np.array([n.end_time for n in sorted_notes])
+                rest_beats = np.concatenate(
+                    ([starts[0]], starts[1:] - ends[:-1])
+                ) * beats_per_second
+                note_beats = (ends - starts) * beats_per_second
+                rest_duration_types = [
+                    _DURATION_NAMES[i] for i in _quantize_bucket(rest_beats)
+                ]
+                note_duration_types = [
+                    _DURATION_NAMES[i] for i in _quantize_bucket(note_beats)
+                ]
+
+                for note_idx, n in enumerate(sorted_notes):
                     # Add rest if there's a gap
-                    if n.start_time > current_time:
-                        rest_duration = n.start_time - current_time
-                        rest_duration_type = self.quantize_duration(rest_duration, tempo_bpm)
-                        rest = note.Rest(duration=duration.Duration(rest_duration_type))
+                    if rest_beats[note_idx] > 0:
+                        rest = note.Rest(
+                            duration=duration.Duration(rest_duration_types[note_idx]))
                         part.append(rest)
-                    
-                    # Create the note
-                    note_duration = n.end_time - n.start_time
-                    note_duration_type = self.quantize_duration(note_duration, tempo_bpm)
-                    
-                    # Create music21 note
+
+                    note_duration_type = note_duration_types[note_idx]
+
+                    # Create music21 note (from the cached name string,
+                    # which skips a fresh Pitch() per note)
                     try:
                         m21_note = note.Note(
-                            pitch.Pitch(midi=int(n.pitch)),
+                            _midi_name(int(n.pitch)),
                             duration=duration.Duration(note_duration_type)
                         )
                         m21_note.volume.velocity = n.velocity
@@ -139,8 +176,6 @@ class SheetMusicGenerator:
                         # Add a rest instead
                         rest = note.Rest(duration=duration.Duration(note_duration_type))
                         part.append(rest)
-                    
-                    current_time = n.end_time
             
             # Add the part to the score
             score.append(part)
@@ -151,7 +186,7 @@ class SheetMusicGenerator:
             logging.error(f"Failed to create music21 score: {str(e)}")
             raise
     
-    def save_musicxml(self, score: stream.Stream, output_path: str) -> str:
+    def save_musicxml(self, score: "stream.Stream", output_path: str) -> str:
         """
         Save score as MusicXML file.
         
@@ -180,7 +215,7 @@ class SheetMusicGenerator:
             logging.error(f"Failed to save MusicXML: {str(e)}")
             raise
     
-    def save_midi(self, score: stream.Stream, output_path: str) -> str:
+    def save_midi(self, score: "stream.Stream", output_path: str) -> str:
         """
         Save score as MIDI file.
         
@@ -209,7 +244,53 @@ class SheetMusicGenerator:
             logging.error(f"Failed to save MIDI: {str(e)}")
             raise
     
-    def save_png(self, score: stream.Stream, output_path: str) -> Optional[str]:
+    def save_midi_fast(self, notes: List[Note], tempo_bpm: float, output_path: str) -> str:
+        """
+        Save transcribed notes directly as a MIDI file using pretty_midi.
+
+        Bypasses the music21 object graph, whose per-note construction
+        cost dominates MIDI export for large transcriptions.
+
+        Args:
+            notes: List of Note objects
+            tempo_bpm: Tempo in BPM
+            output_path: Output file path
+
+        Returns:
+            Path to saved file
+        """
+        import pretty_midi
+
+        try:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Ensure .mid extension
+            if output_path.suffix.lower() not in ['.mid', '.midi']:
+                output_path = output_path.with_suffix('.mid')
+
+            pm = pretty_midi.PrettyMIDI(initial_tempo=tempo_bpm)
+            instrument = pretty_midi.Instrument(program=0)
+            instrument.notes = [
+                pretty_midi.Note(
+                    velocity=int(n.velocity),
+                    pitch=int(n.pitch),
+                    start=n.start_time,
+                    end=n.end_time,
+                )
+                for n in notes
+            ]
+            pm.instruments.append(instrument)
+            pm.write(str(output_path))
+            logging.info(f"Saved MIDI to {output_path}")
+
+            return str(output_path)
+
+        except Exception as e:
+            logging.error(f"Failed to save MIDI: {str(e)}")
+            raise
+
+    def save_png(self, score: "stream.Stream", output_path: str) -> Optional[str]:
         """
         Save score as PNG image (requires additional software).
         
@@ -257,36 +338,34 @@ class SheetMusicGenerator:
             score = self.create_music21_score(notes, tempo_bpm)
             
             output_files = {}
-            
-            # Save MusicXML
-            try:
-                xml_path = self.save_musicxml(score, f"{output_dir}/{filename}.xml")
-                output_files['musicxml'] = xml_path
-            except Exception as e:
-                logging.error(f"Failed to save MusicXML: {e}")
-            
-            # Save MIDI
-            try:
-                midi_path = self.save_midi(score, f"{output_dir}/{filename}.mid")
-                output_files['midi'] = midi_path
-            except Exception as e:
-                logging.error(f"Failed to save MIDI: {e}")
-            
-            # Try to save PNG (optional)
-            try:
-                png_path = self.save_png(score, f"{output_dir}/{filename}.png")
-                if png_path:
-                    output_files['png'] = png_path
-            except Exception as e:
-                logging.warning(f"PNG export not available: {e}")
-            
+
+            # The three exporters only read the score, so run them in
+            # parallel and overlap serialization with file I/O
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = {
+                    'musicxml': executor.submit(
+                        self.save_musicxml, score, f"{output_dir}/{filename}.xml"),
+                    'midi': executor.submit(
+                        self.save_midi_fast, notes, tempo_bpm,
+                        f"{output_dir}/{filename}.mid"),
+                    'png': executor.submit(
+                        self.save_png, score, f"{output_dir}/{filename}.png"),
+                }
+                for format_type, future in futures.items():
+                    try:
+                        file_path = future.result()
+                        if file_path:
+                            output_files[format_type] = file_path
+                    except Exception as e:
+                        logging.error(f"Failed to save {format_type}: {e}")
+
             return output_files
             
         except Exception as e:
             logging.error(f"Failed to generate sheet music: {str(e)}")
             raise
     
-    def get_score_info(self, score: stream.Stream) -> dict:
+    def get_score_info(self, score: "stream.Stream") -> dict:
         """
         Get information about the generated score.
         
@@ -296,6 +375,8 @@ class SheetMusicGenerator:
         Returns:
             Dictionary with score information
         """
+        from music21 import note, key, meter, tempo
+
         try:
             # Analyze the score
             parts = score.parts